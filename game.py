@@ -1,26 +1,21 @@
 import time
 import life
 import logging
+import numpy as np
 logging.basicConfig(level=logging.WARNING)
 width = 50 
 height = 50
+border = "="*(width+2)
 game = life.Life(width, height)
 
 try:
     while True:
         game.next_generation()
-        print("="*(width+2))
-        for x in range(width):
-            row = ""
-            for y in range(height):
-                if game.cells[x][y].state:
-                    row += "o"
-                else:
-                    row += " "
-            print("|"+row+"|")
-        print("="*(width+2))
+        chars = np.where(game.cells, ord("o"), ord(" ")).astype(np.uint8)
+        print(border)
+        print("\n".join("|"+row.tobytes().decode()+"|" for row in chars))
+        print(border)
         time.sleep(0.1)
         print(chr(27) + "[2J")
 except KeyboardInterrupt:
     pass
-
@@ -1,175 +1,187 @@
-import logging
-import random
-
-class Cell:
-    """Represents one cell in the grid.
-
-    A cell has the following (public) properties:
-
-    x, y        - Position (positive int).
-    state       - Boolean: Alive (True) or Dead (False).
-    neighbors   - Dict of neighboring Cell objects. Accessed by e.g. 'N', 'SE', etc.
-
-    switch_state()                  - Switch from Alive to Dead and vice versa.
-    set_neighbor(direction, cell)   - Set Cell object as neighbor.
-    count_live_neighbors()          - Returns number of neighbors that are alive.
-    set_new_state(new_state)        - Set new state for the next iteration.
-    apply_new_state()               - Set state = new_state.
-    """
-    def __init__(self, x=0, y=0, state=False):
-        """Init Cell object.
-
-        x, y    -- Position (positive int, defaults 0).
-        state   -- Initial state (default False).
-        """
-        self.x = x
-        self.y = y
-        self.state = state
-        # Initially, a cell has no neighbors.
-        self.neighbors = {
-                "N":  None,
-                "NW": None,
-                "W":  None,
-                "SW": None,
-                "S":  None,
-                "SE": None,
-                "E":  None,
-                "NE": None,
-                }
-        self.logger = logging.getLogger(self.__class__.__name__)
-        self.logger.debug("Cell {} initialized: {}".format(id(self), self))
-
-    def __repr__(self):
-        return("x={}, y={}, state={}".format(self.x, self.y, self.state))
-
-    def switch_state(self):
-        """Switch alive/dead state."""
-        self.state = not self.state
-        self.logger.debug("Cell {} switched state to {}".format(id(self), self.state))
-
-    def set_state(self, state):
-        """Set alive/dead state."""
-        self.state = state
-        self.logger.debug("Cell {} state set to {}".format(id(self), self.state))
-
-    def set_neighbor(self, direction, cell):
-        """Set a neighbor in position relative to this cell.
-        
-        direction   -- N, NW, W, SW, S, SE, E or NE.
-        cell        -- Neighboring Cell object.
-        """
-        self.neighbors[direction] = cell
-        self.logger.debug("[{}, {}] located {} of [{}, {}]".format(cell.x, cell.y, direction, self.x, self.y))
-
-    def count_live_neighbors(self):
-        """Return neighboring cells that are alive."""
-        n_live_neighbors = sum(1 for x in self.neighbors.values() if x is not None and x.state)
-        self.logger.debug("[{}, {}] has {} neighbors".format(self.x, self.y, n_live_neighbors))
-        return(n_live_neighbors)
-
-    def set_new_state(self, new_state):
-        """Set new state for the next iteration."""
-        self.new_state = new_state
-        self.logger.debug("[{}, {}] new state {}".format(self.x, self.y, self.new_state))
-
-    def apply_new_state(self):
-        """Apply new state."""
-        self.state = self.new_state
-        self.logger.debug("[{}, {}] new state {} applied".format(self.x, self.y, self.state))
-
-
-class Life:
-    """Represents the grid of Cells and implements game logic.
-    
-    After creating the Life object, the next iteration of the game is generated using the next_generation() method.
-    """
-
-    # This translates compass points to x,y offsets.
-    directions = {
-        "N" : [ 0, +1],
-        "NW": [-1, +1],
-        "W" : [-1,  0],
-        "SW": [-1, -1],
-        "S" : [ 0, -1],
-        "SE": [+1, -1],
-        "E" : [+1,  0],
-        "NE": [+1, +1],
-        }
-    
-    def __init__(self, width=5, height=5):
-        """Initialize the grid, populate it with Cell objects and announce neighboring cells.
-
-        width   -- Number of cells in x direction (default 5)
-        height  -- Number of cells in y direction (default 5)
-        """
-        self.width = width
-        self.height = height
-        self.logger = logging.getLogger(self.__class__.__name__)
-        self.logger.debug("Life {} initialized: {}".format(id(self), self))
-        self.create_cells()
-        self.randomize_cells()
-        #self.invert_cells()
-        self.set_neighbors()
-
-    def __repr__(self):
-        return("width={}, height={}".format(self.width, self.height))
-
-    def create_cells(self):
-        """Create Cell objects for each grid element."""
-        self.cells = [ [Cell(x, y, False) for y in range(self.height)] for x in range(self.width)]
-        self.logger.debug(self.cells)
-        self.logger.debug("All cells created")
-        
-    def randomize_cells(self):
-        """Randomize state of all cells."""
-        [ [self.cells[x][y].set_state(bool(random.randint(0, 1))) for x in range(self.width)] for y in range(self.height)]
-        self.logger.debug("All cells randomized")
-
-    def invert_cells(self):
-        """Switch state of all cells."""
-        [ [self.cells[x][y].switch_state() for x in range(self.width)] for y in range(self.height)]
-        self.logger.debug("All cells inverted")
-
-    def set_neighbors(self):
-        """Populate each cells dict of neighbors."""
-        for y in range(self.height):
-            for x in range(self.width):
-                for direction, dxy in self.directions.items():
-                    dx = dxy[0]
-                    dy = dxy[1]
-                    try:
-                        if((x+dx)<0 or (y+dy)<0):
-                            # This prevents a wrapping grid by disallowing negative indices.
-                            raise IndexError("Negative index not allowed!")
-                        else:
-                            self.cells[x+dx][y+dy]
-                            self.cells[x][y].set_neighbor(direction, self.cells[x+dx][y+dy])
-                    except IndexError:
-                        self.logger.debug("No neighbor {} of [{}, {}]".format(direction, x, y))
-                        pass
-
-    def next_generation(self):
-        """Calculate the next iteration using Conway's rules.
-
-        https://en.wikipedia.org/wiki/Conway's_Game_of_Life#Rules
-        """
-        # Calculate the new state of each cell, but don't apply it yet for synchronous updates.
-        for y in range(self.height):
-            for x in range(self.width):
-                n_live_neighbors = self.cells[x][y].count_live_neighbors()
-                if self.cells[x][y].state:
-                    # Cell is alive
-                    if n_live_neighbors < 2 or n_live_neighbors > 3:
-                        self.cells[x][y].set_new_state(False)
-                    else:
-                        self.cells[x][y].set_new_state(self.cells[x][y].state)
-                else:
-                    # Cell is dead
-                    if n_live_neighbors == 3:
-                        self.cells[x][y].set_new_state(True)
-                    else:
-                        self.cells[x][y].set_new_state(self.cells[x][y].state)
-        # Apply new state.
-        for y in range(self.height):
-            for x in range(self.width):
-                self.cells[x][y].apply_new_state()
+import logging
+import numba
+import numpy as np
+
+# Shift amounts have to be uint64 as well, or Numba promotes the words to float.
+_1 = np.uint64(1)
+_63 = np.uint64(63)
+
+# Size of the tiles of the grid that are skipped when nothing changed around them.
+TILE_ROWS = 32
+TILE_WORDS = 1
+
+
+@numba.njit(cache=True)
+def _half_adder(a, b):
+    """Add two bit-sliced words, return (sum, carry)."""
+    return(a ^ b, a & b)
+
+@numba.njit(cache=True)
+def _full_adder(a, b, c):
+    """Add three bit-sliced words, return (sum, carry)."""
+    t = a ^ b
+    return(t ^ c, (a & b) | (t & c))
+
+@numba.njit(cache=True, inline="always")
+def _step_row(above, row, below, out, mask, diff):
+    """Write the next generation of a run of words into out, and OR the bits that changed into diff.
+
+    above, row and below hold the run plus one word on each side, out, mask and diff hold just the run.
+    """
+    # Index the slices from 0, so no wraparound check for negative indices is needed and LLVM vectorizes
+    # this loop with contiguous loads (with AVX2, four words per instruction). Keep it free of branches.
+    for k in range(len(out)):
+        # Align the west and east neighbors of each cell with the cell itself, carrying bits across words.
+        nw = (above[k] >> _63) | (above[k+1] << _1)
+        ne = (above[k+1] >> _1) | (above[k+2] << _63)
+        w = (row[k] >> _63) | (row[k+1] << _1)
+        e = (row[k+1] >> _1) | (row[k+2] << _63)
+        sw = (below[k] >> _63) | (below[k+1] << _1)
+        se = (below[k+1] >> _1) | (below[k+2] << _63)
+        # Count the eight neighbors of 64 cells at once with a tree of bit-sliced adders.
+        s_a, c_a = _full_adder(nw, above[k+1], ne)
+        s_b, c_b = _full_adder(sw, below[k+1], se)
+        s_c, c_c = _half_adder(w, e)
+        ones, c_d = _full_adder(s_a, s_b, s_c)
+        t, c_e = _full_adder(c_a, c_b, c_c)
+        twos, c_f = _half_adder(t, c_d)
+        fours = c_e | c_f
+        # Alive next with 3 neighbors, or with 2 if alive now.
+        word = twos & ~fours & (ones | row[k+1]) & mask[k]
+        diff[k] |= word ^ row[k+1]
+        out[k] = word
+
+@numba.njit(cache=True, inline="always")
+def _column_changed(changed, ti, tj):
+    """Return whether tile [ti, tj] or the tiles above and below it changed in the last generation."""
+    return(changed[ti, tj] or (ti > 0 and changed[ti-1, tj]) or (ti+1 < changed.shape[0] and changed[ti+1, tj]))
+
+@numba.njit(cache=True, inline="always")
+def _step_tiles(rows, out, mask, changed_next, diff, ti, tj0, tj1):
+    """Update the run of tiles tj0 to tj1-1 in band ti of the grid, and flag the tiles that changed."""
+    i0 = 1 + ti*TILE_ROWS
+    i1 = min(i0 + TILE_ROWS, rows.shape[0]-1)
+    k0 = 1 + tj0*TILE_WORDS
+    k1 = min(1 + tj1*TILE_WORDS, rows.shape[1]-1)
+    diff = diff[k0-1:k1-1]
+    diff[:] = 0
+    for i in range(i0, i1):
+        _step_row(rows[i-1, k0-1:k1+1], rows[i, k0-1:k1+1], rows[i+1, k0-1:k1+1],
+                  out[i, k0:k1], mask[k0-1:k1-1], diff)
+    for k in range(len(diff)):
+        if diff[k]:
+            changed_next[ti, tj0 + k // TILE_WORDS] = True
+
+@numba.njit(parallel=True, cache=True)
+def _step(rows, out, mask, changed, changed_next, diff):
+    """Write the generation following rows into out, both bit-packed with a dead border.
+
+    The border (halo) is never written, so it stays dead and the stencil can read rows[i±1, k±1]
+    without checking for the edges of the grid.
+
+    changed flags the tiles of TILE_ROWS x TILE_WORDS that changed in the last generation. A tile whose
+    3x3 neighborhood of tiles did not change stays the same, and out already holds it from two generations
+    back, so it is skipped. Runs of neighboring tiles that need updating are swept row by row in one go,
+    the bits that changed are collected per word in diff (one row per band of tiles) and reduced to the
+    flags in changed_next.
+    """
+    n_tile_cols = changed.shape[1]
+    for ti in numba.prange(changed.shape[0]):
+        changed_next[ti] = False
+        # Slide a window of three tile columns along the band, to find the runs of tiles next to changes.
+        west = False
+        center = _column_changed(changed, ti, 0)
+        run_start = -1
+        for tj in range(n_tile_cols):
+            east = tj+1 < n_tile_cols and _column_changed(changed, ti, tj+1)
+            if west or center or east:
+                if run_start < 0:
+                    run_start = tj
+            elif run_start >= 0:
+                _step_tiles(rows, out, mask, changed_next, diff[ti], ti, run_start, tj)
+                run_start = -1
+            west, center = center, east
+        if run_start >= 0:
+            _step_tiles(rows, out, mask, changed_next, diff[ti], ti, run_start, n_tile_cols)
+
+
+class Life:
+    """Represents the grid of cells and implements game logic.
+
+    The cells are stored bit-packed, 64 cells per uint64 word (bit set = alive):
+
+    rows        - Array of shape (height+2, ceil(width/64)+2). Cell [x, y] is bit x%64 of rows[y+1, x//64+1],
+                  the outermost rows and words are a border of permanently dead cells.
+    changed     - Boolean array with one flag per tile of TILE_ROWS rows x TILE_WORDS words, set if the tile
+                  changed in the last generation. Only tiles next to changed ones are recalculated.
+    cells       - Unpacked copy of the grid as an array of shape (height, width), 1 = alive, 0 = dead.
+
+    After creating the Life object, the next iteration of the game is generated using the next_generation() method.
+    """
+
+    def __init__(self, width=5, height=5):
+        """Initialize the grid and populate it with random cells.
+
+        width   -- Number of cells in x direction (default 5)
+        height  -- Number of cells in y direction (default 5)
+        """
+        self.width = width
+        self.height = height
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.logger.debug("Life %s initialized: %s", id(self), self)
+        self.n_words = -(-self.width // 64)
+        self.rows = np.zeros((self.height+2, self.n_words+2), dtype=np.uint64)
+        # The next generation is written into a second buffer, which then swaps places with rows.
+        self.rows_next = np.zeros_like(self.rows)
+        # Bits of the last word beyond the grid width have to stay dead.
+        self.mask = np.full(self.n_words, 2**64-1, dtype=np.uint64)
+        if self.width % 64:
+            self.mask[-1] = 2**(self.width % 64) - 1
+        n_tiles = (-(-self.height // TILE_ROWS), -(-self.n_words // TILE_WORDS))
+        self.changed = np.ones(n_tiles, dtype=np.bool_)
+        self.changed_next = np.ones(n_tiles, dtype=np.bool_)
+        self.diff = np.zeros((n_tiles[0], self.n_words), dtype=np.uint64)
+        self.rng = np.random.default_rng()
+        self.randomize_cells()
+        #self.invert_cells()
+
+    def __repr__(self):
+        return("width={}, height={}".format(self.width, self.height))
+
+    @property
+    def cells(self):
+        """Unpacked copy of the grid, 1 = alive, 0 = dead."""
+        # Cell [x, y] is bit x%64 of its word, so the bytes of the words have to be unpacked in little-endian order.
+        packed = self.rows[1:-1, 1:-1].astype("<u8").view(np.uint8)
+        return(np.unpackbits(packed, axis=1, count=self.width, bitorder="little"))
+
+    def set_cells(self, cells):
+        """Set state of all cells from an array of shape (height, width), 1 = alive, 0 = dead."""
+        packed = np.zeros((self.height, self.n_words*8), dtype=np.uint8)
+        packed[:, :-(-self.width // 8)] = np.packbits(cells, axis=1, bitorder="little")
+        # Same byte order as in cells, the assignment converts the words to native byte order.
+        self.rows[1:-1, 1:-1] = packed.view("<u8")
+        self.changed[...] = True
+
+    def randomize_cells(self):
+        """Randomize state of all cells."""
+        # One random bit per cell, drawn straight into the packed words.
+        words = np.frombuffer(self.rng.bytes(self.height*self.n_words*8), dtype=np.uint64)
+        self.rows[1:-1, 1:-1] = words.reshape(self.height, self.n_words) & self.mask
+        self.changed[...] = True
+        self.logger.debug("All cells randomized")
+
+    def invert_cells(self):
+        """Switch state of all cells."""
+        self.rows[1:-1, 1:-1] ^= self.mask
+        self.changed[...] = True
+        self.logger.debug("All cells inverted")
+
+    def next_generation(self):
+        """Calculate the next iteration using Conway's rules.
+
+        https://en.wikipedia.org/wiki/Conway's_Game_of_Life#Rules
+        """
+        _step(self.rows, self.rows_next, self.mask, self.changed, self.changed_next, self.diff)
+        self.rows, self.rows_next = self.rows_next, self.rows
+        self.changed, self.changed_next = self.changed_next, self.changed
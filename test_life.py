@@ -0,0 +1,78 @@
+import unittest
+import numpy as np
+import life
+
+
+def reference_generation(cells):
+    """Return the next generation of an unpacked grid, computed cell by cell with NumPy."""
+    height, width = cells.shape
+    padded = np.pad(cells, 1)
+    n_live_neighbors = sum(padded[dy:dy+height, dx:dx+width]
+                           for dy in range(3) for dx in range(3) if (dy, dx) != (1, 1))
+    return(((n_live_neighbors == 3) | ((n_live_neighbors == 2) & (cells == 1))).astype(np.uint8))
+
+GLIDER = np.array([[0, 1, 0],
+                   [0, 0, 1],
+                   [1, 1, 1]], dtype=np.uint8)
+
+
+class TestLife(unittest.TestCase):
+
+    def assert_generations(self, game, cells, n_generations):
+        """Step game and the reference side by side and compare every generation."""
+        for generation in range(n_generations):
+            game.next_generation()
+            cells = reference_generation(cells)
+            np.testing.assert_array_equal(game.cells, cells, "generation {}".format(generation))
+        return(cells)
+
+    def test_set_cells(self):
+        rng = np.random.default_rng(0)
+        for width in (1, 63, 64, 65, 200):
+            game = life.Life(width, 7)
+            cells = rng.integers(0, 2, (7, width), dtype=np.uint8)
+            game.set_cells(cells)
+            np.testing.assert_array_equal(game.cells, cells)
+
+    def test_random_grids(self):
+        # Widths below, at and above a word, and grids spanning more than one tile in both directions.
+        tile_width = 64*life.TILE_WORDS
+        sizes = [(1, 5), (5, 5), (63, 9), (64, 9), (65, 9), (50, 50),
+                 (2*tile_width + 5, 2*life.TILE_ROWS + 3), (3*tile_width, 3*life.TILE_ROWS)]
+        rng = np.random.default_rng(1)
+        for width, height in sizes:
+            with self.subTest(width=width, height=height):
+                game = life.Life(width, height)
+                cells = rng.integers(0, 2, (height, width), dtype=np.uint8)
+                game.set_cells(cells)
+                self.assert_generations(game, cells, 30)
+
+    def test_glider_crosses_tiles(self):
+        # The glider moves one cell down and right every four generations, across tile and word boundaries.
+        width = 3*64*life.TILE_WORDS + 10
+        height = 3*life.TILE_ROWS + 10
+        game = life.Life(width, height)
+        cells = np.zeros((height, width), dtype=np.uint8)
+        cells[1:4, 1:4] = GLIDER
+        # A blinker far away keeps some other tile busy.
+        cells[height-5, width-6:width-3] = 1
+        game.set_cells(cells)
+        self.assert_generations(game, cells, 4*min(width, height) - 40)
+
+    def test_invert_and_randomize(self):
+        game = life.Life(130, 2*life.TILE_ROWS + 1)
+        cells = np.zeros((game.height, game.width), dtype=np.uint8)
+        cells[1:4, 1:4] = GLIDER
+        game.set_cells(cells)
+        cells = self.assert_generations(game, cells, 10)
+        game.invert_cells()
+        cells = 1 - cells
+        np.testing.assert_array_equal(game.cells, cells)
+        cells = self.assert_generations(game, cells, 10)
+        game.randomize_cells()
+        self.assertFalse(game.rows[:, 0].any() or game.rows[:, -1].any() or game.rows[0].any() or game.rows[-1].any())
+        self.assert_generations(game, game.cells, 10)
+
+
+if __name__ == "__main__":
+    unittest.main()